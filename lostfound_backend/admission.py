@@ -0,0 +1,274 @@
+"""
+Admission control and load shedding
+Per-route-class concurrency limits sized to the DB pool, a bounded priority
+wait queue (fast 503 + Retry-After on overflow), and per-client token-bucket
+rate limits on expensive routes (429 + Retry-After).
+"""
+
+from starlette.responses import JSONResponse
+from database import DB_POOL_SIZE, DB_MAX_OVERFLOW
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+import asyncio
+import itertools
+import math
+import os
+import time
+
+# Configuration (per worker process)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 50))
+ADMISSION_WAIT_TIMEOUT = float(os.getenv("ADMISSION_WAIT_TIMEOUT", 2))
+ADMISSION_UPLOAD_LIMIT = int(os.getenv("ADMISSION_UPLOAD_LIMIT", 4))
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", 60))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 10))
+
+RETRY_AFTER_SECONDS = 1
+
+# Paths that never touch the admission controller (no DB work, or long-lived streams)
+EXEMPT_PREFIXES = ("/health", "/feed", "/ws", "/uploads", "/docs", "/redoc", "/openapi.json")
+
+
+# ============================================
+# Route Classes
+# ============================================
+
+class RouteClass:
+    """A group of routes sharing a concurrency limit and priority (lower runs first)"""
+
+    def __init__(self, name: str, priority: int, limit: int, rate_limited: bool = False):
+        self.name = name
+        self.priority = priority
+        self.limit = max(1, limit)
+        self.rate_limited = rate_limited
+
+
+ROUTE_CLASSES = {
+    "read": RouteClass("read", 0, ADMISSION_CAPACITY),
+    "write": RouteClass("write", 1, ADMISSION_CAPACITY // 2),
+    "list": RouteClass("list", 1, ADMISSION_CAPACITY * 3 // 4),
+    "search": RouteClass("search", 2, ADMISSION_CAPACITY // 4, rate_limited=True),
+    "users": RouteClass("users", 2, ADMISSION_CAPACITY // 4, rate_limited=True),
+    "upload": RouteClass("upload", 2, ADMISSION_UPLOAD_LIMIT, rate_limited=True),
+}
+
+
+def classify(method: str, path: str, query_string: bytes = b"") -> Optional[RouteClass]:
+    """Map a request to its route class (None = not admission controlled)"""
+    if method == "OPTIONS" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    path = path.rstrip("/") or "/"
+
+    if method == "POST" and path == "/items/upload":
+        return ROUTE_CLASSES["upload"]
+    if method not in ("GET", "HEAD"):
+        return ROUTE_CLASSES["write"]
+
+    if path == "/items":
+        query = parse_qs(query_string.decode("latin-1")).get("query", [""])[0]
+        return ROUTE_CLASSES["search"] if query.strip() else ROUTE_CLASSES["list"]
+    if path == "/users":
+        return ROUTE_CLASSES["users"]
+    if path.startswith("/admin"):
+        return ROUTE_CLASSES["list"]
+    return ROUTE_CLASSES["read"]
+
+
+# ============================================
+# Concurrency Limiter
+# ============================================
+
+class AdmissionController:
+    """
+    Global + per-class in-flight limits with a bounded wait queue.
+    When a slot frees up, waiters are woken in priority order, so cheap reads
+    queued behind searches are admitted first.
+    """
+
+    def __init__(self, capacity: int = ADMISSION_CAPACITY, queue_size: int = ADMISSION_QUEUE_SIZE,
+                 wait_timeout: float = ADMISSION_WAIT_TIMEOUT):
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.wait_timeout = wait_timeout
+        self.in_flight = 0
+        self.class_in_flight: Dict[str, int] = {name: 0 for name in ROUTE_CLASSES}
+        self.rejected: Dict[str, int] = {name: 0 for name in ROUTE_CLASSES}
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+
+    def _can_run(self, route_class: RouteClass) -> bool:
+        return (self.in_flight < self.capacity
+                and self.class_in_flight[route_class.name] < route_class.limit)
+
+    def _grant(self, route_class: RouteClass):
+        self.in_flight += 1
+        self.class_in_flight[route_class.name] += 1
+
+    async def acquire(self, route_class: RouteClass) -> bool:
+        """Take a slot, waiting briefly if needed; False means shed the request"""
+        if self._can_run(route_class):
+            self._grant(route_class)
+            return True
+        if len(self._waiters) >= self.queue_size and not self._evict_below(route_class.priority):
+            self.rejected[route_class.name] += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (route_class.priority, next(self._seq), route_class, future)
+        self._waiters.append(entry)
+        try:
+            # True: _wake() already counted our slot; False: evicted by a higher priority
+            granted = await asyncio.wait_for(future, timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            # The timeout can race a grant from _wake(): if our slot was counted, use it
+            granted = future.done() and not future.cancelled() and future.result()
+        except asyncio.CancelledError:
+            # Client went away after being granted a slot: hand it back
+            if future.done() and not future.cancelled() and future.result():
+                self.release(route_class)
+            raise
+        finally:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+        if not granted:
+            self.rejected[route_class.name] += 1
+        return granted
+
+    def _evict_below(self, priority: int) -> bool:
+        """Make room in a full queue by shedding the newest lower-priority waiter"""
+        candidates = [e for e in self._waiters if e[0] > priority and not e[3].done()]
+        if not candidates:
+            return False
+        entry = max(candidates, key=lambda e: e[:2])
+        self._waiters.remove(entry)
+        entry[3].set_result(False)
+        return True
+
+    def release(self, route_class: RouteClass):
+        """Return a slot and admit the highest-priority waiters that now fit"""
+        self.in_flight -= 1
+        self.class_in_flight[route_class.name] -= 1
+        self._wake()
+
+    def _wake(self):
+        for entry in sorted(self._waiters, key=lambda e: e[:2]):
+            if self.in_flight >= self.capacity:
+                break
+            _, _, route_class, future = entry
+            if future.done() or not self._can_run(route_class):
+                continue
+            self._grant(route_class)
+            self._waiters.remove(entry)
+            future.set_result(True)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "classes": {
+                name: {
+                    "limit": route_class.limit,
+                    "in_flight": self.class_in_flight[name],
+                    "rejected": self.rejected[name],
+                }
+                for name, route_class in ROUTE_CLASSES.items()
+            },
+        }
+
+
+# ============================================
+# Rate Limiter
+# ============================================
+
+class RateLimiter:
+    """Per-client token buckets: RATE_LIMIT_PER_MINUTE sustained, RATE_LIMIT_BURST burst"""
+
+    def __init__(self, per_minute: int = RATE_LIMIT_PER_MINUTE, burst: int = RATE_LIMIT_BURST,
+                 max_clients: int = 10000):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: Dict[str, list] = {}
+        self.limited = 0
+
+    def check(self, key: str) -> float:
+        """Spend one token; returns 0 if allowed, else seconds until a token is available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._prune(now)
+            bucket = self._buckets[key] = [float(self.burst), now]
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        self.limited += 1
+        return (1 - tokens) / self.rate if self.rate > 0 else float(RETRY_AFTER_SECONDS)
+
+    def _prune(self, now: float):
+        """Drop buckets that have refilled completely (idle clients)"""
+        refill_seconds = self.burst / self.rate if self.rate > 0 else 0
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated >= refill_seconds]:
+            del self._buckets[key]
+
+
+# ============================================
+# ASGI Middleware
+# ============================================
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware (not BaseHTTPMiddleware, which would wrap the
+    SSE stream): rate-limit, then admit or shed each request.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None,
+                 limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.controller = controller or admission_controller
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if route_class.rate_limited:
+            client = scope.get("client")
+            wait = self.limiter.check(client[0] if client else "unknown")
+            if wait:
+                response = JSONResponse(
+                    {"detail": "Too many requests"}, status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))}
+                )
+                await response(scope, receive, send)
+                return
+
+        if not await self.controller.acquire(route_class):
+            response = JSONResponse(
+                {"detail": "Server busy, please retry"}, status_code=503,
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
+
+
+# Shared per-worker instances
+admission_controller = AdmissionController()
+rate_limiter = RateLimiter()
@@ -0,0 +1,237 @@
+"""
+Hot/cold item archival job
+Moves REUNITED and aged items (plus their matches) from items into
+items_archive in batches, then reports table/index sizes and listing latency.
+Run: python archiver.py [--once] [--report] [--reindex]
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from database import SessionLocal, engine, Item, ItemMatch
+from typing import List
+import argparse
+import os
+import statistics
+import time
+
+# Configuration (environment already loaded by database.py)
+ARCHIVE_REUNITED_DAYS = int(os.getenv("ARCHIVE_REUNITED_DAYS", 30))
+ARCHIVE_MAX_AGE_DAYS = int(os.getenv("ARCHIVE_MAX_AGE_DAYS", 180))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", 24))
+
+# Explicit column list so archive inserts never depend on physical column order
+ITEM_COLUMNS = ", ".join(column.name for column in Item.__table__.columns)
+MATCH_COLUMNS = ", ".join(column.name for column in ItemMatch.__table__.columns)
+
+
+# ============================================
+# Archival
+# ============================================
+
+def claim_batch(db: Session, batch_size: int) -> List:
+    """
+    Lock a batch of archivable items: REUNITED for a while, or simply old.
+    Items with deliverable (un-notified, not dead-lettered) matches stay hot
+    so notifier.py can still deliver them.
+    """
+    rows = db.execute(text("""
+        SELECT i.id FROM items i
+        WHERE (
+            (i.status = 'REUNITED' AND i.updated_at < CURRENT_TIMESTAMP - make_interval(days => :reunited_days))
+            OR i.created_at < CURRENT_TIMESTAMP - make_interval(days => :max_age_days)
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM item_matches m
+            WHERE (m.lost_item_id = i.id OR m.found_item_id = i.id)
+              AND m.notified = FALSE AND m.failed = FALSE
+        )
+        ORDER BY i.created_at
+        LIMIT :batch_size
+        FOR UPDATE OF i SKIP LOCKED
+    """), {
+        "reunited_days": ARCHIVE_REUNITED_DAYS,
+        "max_age_days": ARCHIVE_MAX_AGE_DAYS,
+        "batch_size": batch_size,
+    }).fetchall()
+    return [row.id for row in rows]
+
+
+def archive_batch(db: Session, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move one batch in a single transaction; returns the number of items moved"""
+    ids = claim_batch(db, batch_size)
+    if not ids:
+        db.rollback()
+        return 0
+
+    # Matches first: deleting the items cascades to item_matches
+    db.execute(text(f"""
+        INSERT INTO item_matches_archive ({MATCH_COLUMNS})
+        SELECT {MATCH_COLUMNS} FROM item_matches
+        WHERE lost_item_id = ANY(CAST(:ids AS uuid[])) OR found_item_id = ANY(CAST(:ids AS uuid[]))
+        ON CONFLICT (id) DO NOTHING
+    """), {"ids": ids})
+
+    moved = db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM items WHERE id = ANY(CAST(:ids AS uuid[])) RETURNING {ITEM_COLUMNS}
+        )
+        INSERT INTO items_archive ({ITEM_COLUMNS})
+        SELECT {ITEM_COLUMNS} FROM moved
+    """), {"ids": ids}).rowcount
+    db.commit()
+    return moved
+
+
+def restore_item(db: Session, item_id: str) -> bool:
+    """
+    Move one archived item (and any matches whose both sides are hot again)
+    back into the hot tables so it can be edited. Does not commit; the caller's
+    write commits it together with the change. Returns False if not archived.
+    The restoring INSERT is kept off the item feed (it is not a new report);
+    the caller's UPDATE still notifies as usual.
+    """
+    db.execute(text("SELECT set_config('lostfound.feed_notify', 'off', true)"))
+    restored = db.execute(text(f"""
+        WITH restored AS (
+            DELETE FROM items_archive WHERE id = CAST(:id AS uuid) RETURNING {ITEM_COLUMNS}
+        )
+        INSERT INTO items ({ITEM_COLUMNS})
+        SELECT {ITEM_COLUMNS} FROM restored
+    """), {"id": item_id}).rowcount
+    db.execute(text("SELECT set_config('lostfound.feed_notify', 'on', true)"))
+    if not restored:
+        return False
+
+    db.execute(text(f"""
+        WITH restored AS (
+            DELETE FROM item_matches_archive ma
+            WHERE (ma.lost_item_id = CAST(:id AS uuid) OR ma.found_item_id = CAST(:id AS uuid))
+              AND EXISTS (SELECT 1 FROM items WHERE id = ma.lost_item_id)
+              AND EXISTS (SELECT 1 FROM items WHERE id = ma.found_item_id)
+            RETURNING {MATCH_COLUMNS}
+        )
+        INSERT INTO item_matches ({MATCH_COLUMNS})
+        SELECT {MATCH_COLUMNS} FROM restored
+        ON CONFLICT DO NOTHING
+    """), {"id": item_id})
+    return True
+
+
+def delete_archived(db: Session, item_id: str) -> bool:
+    """
+    Delete an item from cold storage without restoring it, plus every archived
+    match that references it (either side; the archive has no FK to cascade).
+    Also clears archived matches left behind by an earlier restore of a hot item.
+    Does not commit. Returns False if the item was not archived.
+    """
+    db.execute(text("""
+        DELETE FROM item_matches_archive
+        WHERE lost_item_id = CAST(:id AS uuid) OR found_item_id = CAST(:id AS uuid)
+    """), {"id": item_id})
+    return bool(db.execute(
+        text("DELETE FROM items_archive WHERE id = CAST(:id AS uuid)"), {"id": item_id}
+    ).rowcount)
+
+
+def maintain(reindex: bool = False):
+    """Reclaim dead tuples after a large move; REINDEX actually shrinks the indexes"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM (ANALYZE) items"))
+        conn.execute(text("VACUUM (ANALYZE) item_matches"))
+        if reindex:
+            conn.execute(text("REINDEX TABLE CONCURRENTLY items"))
+
+
+# ============================================
+# Reporting
+# ============================================
+
+def table_sizes(db: Session) -> dict:
+    """Row counts plus heap/index sizes for the hot and cold tables"""
+    sizes = {}
+    for table in ("items", "items_archive"):
+        row = db.execute(text(f"""
+            SELECT COUNT(*) AS row_count,
+                   pg_size_pretty(pg_table_size('{table}')) AS table_size,
+                   pg_size_pretty(pg_indexes_size('{table}')) AS index_size
+            FROM {table}
+        """)).one()
+        sizes[table] = dict(row._mapping)
+    return sizes
+
+
+def listing_latency(db: Session, runs: int = 5) -> float:
+    """Median milliseconds for the default GET /items?status=LOST query (count + first page)"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        db.execute(text("SELECT COUNT(*) FROM items WHERE status = 'LOST'")).scalar()
+        db.execute(text(
+            "SELECT * FROM items WHERE status = 'LOST' ORDER BY created_at DESC LIMIT 20"
+        )).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def print_report(db: Session, label: str):
+    print(f"\n {label}")
+    for table, info in table_sizes(db).items():
+        print(f"   - {table}: {info['row_count']} rows, table {info['table_size']}, indexes {info['index_size']}")
+    print(f"   - GET /items?status=LOST: {listing_latency(db):.2f} ms (median)")
+    db.rollback()
+
+
+# ============================================
+# Runner
+# ============================================
+
+def run_once(batch_size: int = ARCHIVE_BATCH_SIZE, reindex: bool = False) -> int:
+    """Drain everything archivable, report before/after; returns items moved"""
+    db = SessionLocal()
+    try:
+        print_report(db, "Before archival")
+        total = 0
+        while True:
+            moved = archive_batch(db, batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+        print(f"\n Archived {total} items")
+
+        if total or reindex:
+            maintain(reindex)
+        print_report(db, "After archival")
+        return total
+    except Exception as e:
+        print(f"\n Error during archival: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move REUNITED and aged items to cold storage")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    parser.add_argument("--report", action="store_true", help="Only print sizes and listing latency")
+    parser.add_argument("--reindex", action="store_true", help="REINDEX items after archiving")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.report:
+        db = SessionLocal()
+        try:
+            print_report(db, "Current storage")
+        finally:
+            db.close()
+    elif args.once:
+        run_once(args.batch_size, args.reindex)
+    else:
+        print(f"\n Archiver running every {ARCHIVE_INTERVAL_HOURS}h (Ctrl+C to stop)")
+        try:
+            while True:
+                run_once(args.batch_size, args.reindex)
+                time.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
+        except KeyboardInterrupt:
+            pass
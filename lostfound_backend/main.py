@@ -3,27 +3,30 @@ Lost & Found Platform - FastAPI Backend
 Main application file with all routes (simplified for demo)
 """
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from database import (
-    get_db, User, Item, UserCreate, UserResponse,
+    get_db, get_read_db, User, Item, ArchivedItem, UserCreate, UserResponse,
     ItemCreate, ItemUpdate, ItemResponse, ItemListResponse, init_db,
-    convert_uuid_to_str
+    convert_uuid_to_str, DATABASE_URL, READ_STICKY_HEADER, read_primary_until
 )
+from realtime import ItemFeedBroker, ITEM_FEED_ENABLED, CLOSING_EVENT, format_sse
+from notifier import get_outbox_stats
+from archiver import restore_item, delete_archived
+from admission import AdmissionMiddleware, admission_controller, rate_limiter, RETRY_AFTER_SECONDS
 from typing import Optional, List
 from datetime import datetime
+import asyncio
 import os
 import uuid as uuid_pkg
 import shutil
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Configuration
+# Configuration (environment already loaded by database.py)
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 5242880))  # 5MB
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
@@ -32,13 +35,16 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",")
 # Create uploads directory if not exists
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Real-time feed broker (one LISTEN connection per worker process)
+feed_broker = ItemFeedBroker(DATABASE_URL)
+
 
 # ============================================
 # Helper Functions
 # ============================================
 
-def item_to_response(item: Item) -> ItemResponse:
-    """Convert Item ORM object to ItemResponse with UUID converted to string"""
+def item_to_response(item) -> ItemResponse:
+    """Convert Item (or ArchivedItem) ORM object to ItemResponse with UUID converted to string"""
     return ItemResponse(
         id=str(item.id),
         title=item.title,
@@ -59,6 +65,40 @@ def item_to_response(item: Item) -> ItemResponse:
     )
 
 
+def get_item_for_update(db: Session, item_id: str) -> Item:
+    """Load an item for a write, restoring it from the archive first if needed"""
+    item = db.query(Item).filter(Item.id == item_id).first()
+    if not item and restore_item(db, item_id):
+        item = db.query(Item).filter(Item.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item
+
+
+def delete_item_or_archived(db: Session, item_id: str):
+    """Delete a hot or archived item; archived ones are removed in place, never restored"""
+    item = db.query(Item).filter(Item.id == item_id).first()
+    archived = delete_archived(db, item_id)
+    if not item and not archived:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if item:
+        db.delete(item)
+    db.commit()
+
+
+def pin_reads_to_primary(response: Response):
+    """Read-your-writes: after a successful mutation, this client's reads go to the primary briefly"""
+    response.headers[READ_STICKY_HEADER] = read_primary_until()
+
+
+async def wait_for_close(websocket: WebSocket):
+    """Read (and ignore) client messages until the client disconnects"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
 # ============================================
 # FastAPI Application
 # ============================================
@@ -72,6 +112,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Admission control (added before CORS so shed responses still get CORS headers)
+app.add_middleware(AdmissionMiddleware)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -79,12 +122,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[READ_STICKY_HEADER],
 )
 
 # Mount static files for uploads
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 
+@app.exception_handler(PoolTimeoutError)
+def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """DB pool exhausted: fail fast with 503 instead of a 500"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
 # ============================================
 # Startup Event
 # ============================================
@@ -96,6 +150,19 @@ def startup_event():
     print(" FastAPI server started")
 
 
+@app.on_event("startup")
+async def start_item_feed():
+    """Start listening for item change notifications"""
+    if ITEM_FEED_ENABLED:
+        await feed_broker.start()
+
+
+@app.on_event("shutdown")
+async def stop_item_feed():
+    """Close the item feed listener"""
+    await feed_broker.stop()
+
+
 # ============================================
 # Health Check
 # ============================================
@@ -111,7 +178,7 @@ def health_check():
 # ============================================
 
 @app.get("/users", response_model=List[UserResponse], tags=["Users"])
-def get_users(db: Session = Depends(get_db)):
+def get_users(db: Session = Depends(get_read_db)):
     """Get all users"""
     users = db.query(User).all()
     # Manually create response dictionaries with UUID converted to string
@@ -128,7 +195,7 @@ def get_users(db: Session = Depends(get_db)):
 
 
 @app.get("/users/{user_id}", response_model=UserResponse, tags=["Users"])
-def get_user(user_id: str, db: Session = Depends(get_db)):
+def get_user(user_id: str, db: Session = Depends(get_read_db)):
     """Get user by ID"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -142,7 +209,8 @@ def get_user(user_id: str, db: Session = Depends(get_db)):
     )
 
 
-@app.post("/users", response_model=UserResponse, status_code=201, tags=["Users"])
+@app.post("/users", response_model=UserResponse, status_code=201, tags=["Users"],
+          dependencies=[Depends(pin_reads_to_primary)])
 def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     """Create new user"""
     # Check if email exists
@@ -199,36 +267,38 @@ def get_items(
     is_flagged: Optional[bool] = Query(None, description="Filter flagged items"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db)
+    archived: bool = Query(False, description="List archived (REUNITED/aged) items instead"),
+    db: Session = Depends(get_read_db)
 ):
     """Get items with filtering, search, and pagination"""
-    # Base query
-    items_query = db.query(Item)
+    # Base query (hot table by default, cold storage on request)
+    model = ArchivedItem if archived else Item
+    items_query = db.query(model)
     
     # Apply filters
     if query:
         search_filter = or_(
-            Item.title.ilike(f"%{query}%"),
-            Item.description.ilike(f"%{query}%"),
-            Item.location.ilike(f"%{query}%")
+            model.title.ilike(f"%{query}%"),
+            model.description.ilike(f"%{query}%"),
+            model.location.ilike(f"%{query}%")
         )
         items_query = items_query.filter(search_filter)
     
     if status:
-        items_query = items_query.filter(Item.status == status.upper())
+        items_query = items_query.filter(model.status == status.upper())
     
     if category:
-        items_query = items_query.filter(Item.category == category)
+        items_query = items_query.filter(model.category == category)
     
     if is_flagged is not None:
-        items_query = items_query.filter(Item.is_flagged == is_flagged)
+        items_query = items_query.filter(model.is_flagged == is_flagged)
     
     # Get total count
     total = items_query.count()
     
     # Pagination
     offset = (page - 1) * page_size
-    items = items_query.order_by(Item.created_at.desc()).offset(offset).limit(page_size).all()
+    items = items_query.order_by(model.created_at.desc()).offset(offset).limit(page_size).all()
     
     # Convert to response objects
     items_response = [item_to_response(item) for item in items]
@@ -242,15 +312,18 @@ def get_items(
 
 
 @app.get("/items/{item_id}", response_model=ItemResponse, tags=["Items"])
-def get_item(item_id: str, db: Session = Depends(get_db)):
-    """Get single item by ID"""
+def get_item(item_id: str, db: Session = Depends(get_read_db)):
+    """Get single item by ID (falls back to the archive for REUNITED/aged items)"""
     item = db.query(Item).filter(Item.id == item_id).first()
+    if not item:
+        item = db.query(ArchivedItem).filter(ArchivedItem.id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return item_to_response(item)
 
 
-@app.post("/items", response_model=ItemResponse, status_code=201, tags=["Items"])
+@app.post("/items", response_model=ItemResponse, status_code=201, tags=["Items"],
+          dependencies=[Depends(pin_reads_to_primary)])
 def create_item(item_data: ItemCreate, db: Session = Depends(get_db)):
     """Create new item"""
     # Verify reporter exists
@@ -275,16 +348,15 @@ def create_item(item_data: ItemCreate, db: Session = Depends(get_db)):
     return item_to_response(new_item)
 
 
-@app.patch("/items/{item_id}", response_model=ItemResponse, tags=["Items"])
+@app.patch("/items/{item_id}", response_model=ItemResponse, tags=["Items"],
+           dependencies=[Depends(pin_reads_to_primary)])
 def update_item(
     item_id: str,
     item_data: ItemUpdate,
     db: Session = Depends(get_db)
 ):
     """Update item (partial update)"""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+    item = get_item_for_update(db, item_id)
     
     # Update only provided fields
     for field, value in item_data.model_dump(exclude_unset=True).items():
@@ -295,15 +367,11 @@ def update_item(
     return item_to_response(item)
 
 
-@app.delete("/items/{item_id}", status_code=204, tags=["Items"])
+@app.delete("/items/{item_id}", status_code=204, tags=["Items"],
+            dependencies=[Depends(pin_reads_to_primary)])
 def delete_item(item_id: str, db: Session = Depends(get_db)):
     """Delete item"""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    db.delete(item)
-    db.commit()
+    delete_item_or_archived(db, item_id)
     return None
 
 
@@ -311,12 +379,11 @@ def delete_item(item_id: str, db: Session = Depends(get_db)):
 # Admin Endpoints (Simple Flag Operations)
 # ============================================
 
-@app.patch("/admin/items/{item_id}/approve", response_model=ItemResponse, tags=["Admin"])
+@app.patch("/admin/items/{item_id}/approve", response_model=ItemResponse, tags=["Admin"],
+           dependencies=[Depends(pin_reads_to_primary)])
 def approve_item(item_id: str, db: Session = Depends(get_db)):
     """Approve (unflag) an item"""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+    item = get_item_for_update(db, item_id)
     
     item.is_flagged = False
     db.commit()
@@ -324,16 +391,27 @@ def approve_item(item_id: str, db: Session = Depends(get_db)):
     return item_to_response(item)
 
 
-@app.patch("/items/{item_id}/flag", response_model=ItemResponse, tags=["Items"])
+@app.get("/admin/matches/outbox", tags=["Admin"])
+def match_outbox_stats(db: Session = Depends(get_db)):
+    """Pending match notifications and delivery lag (see notifier.py)"""
+    return get_outbox_stats(db)
+
+
+@app.get("/admin/admission", tags=["Admin"])
+def admission_stats():
+    """Admission control and rate limiting counters for this worker"""
+    return {**admission_controller.stats(), "rate_limited": rate_limiter.limited}
+
+
+@app.patch("/items/{item_id}/flag", response_model=ItemResponse, tags=["Items"],
+           dependencies=[Depends(pin_reads_to_primary)])
 def flag_item(
     item_id: str,
     flag_data: dict,
     db: Session = Depends(get_db)
 ):
     """Flag an item for moderation"""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+    item = get_item_for_update(db, item_id)
     
     item.is_flagged = True
     item.flagged_reason = flag_data.get("reason", "Inappropriate content reported by user")
@@ -342,18 +420,80 @@ def flag_item(
     return item_to_response(item)
 
 
-@app.delete("/admin/items/{item_id}", status_code=204, tags=["Admin"])
+@app.delete("/admin/items/{item_id}", status_code=204, tags=["Admin"],
+            dependencies=[Depends(pin_reads_to_primary)])
 def reject_item(item_id: str, db: Session = Depends(get_db)):
     """Reject (delete) a flagged item"""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    db.delete(item)
-    db.commit()
+    delete_item_or_archived(db, item_id)
     return None
 
 
+# ============================================
+# Real-time Feed Endpoints
+# ============================================
+
+@app.get("/feed/items", tags=["Feed"])
+async def item_feed_sse(
+    request: Request,
+    status: Optional[List[str]] = Query(None, description="Only events for these statuses (repeatable)"),
+    category: Optional[List[str]] = Query(None, description="Only events for these categories (repeatable)")
+):
+    """Server-Sent Events stream of new and updated items"""
+
+    async def event_stream():
+        # Subscribe inside the generator: if the client leaves before the first
+        # iteration, the generator never runs and nothing is left to clean up
+        subscription = feed_broker.subscribe(status, category)
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.next_event()
+                yield format_sse(event)
+                if event is CLOSING_EVENT:
+                    # Worker is restarting: end the stream so the drain can finish;
+                    # EventSource reconnects after the retry interval
+                    break
+        finally:
+            feed_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/ws/items")
+async def item_feed_ws(
+    websocket: WebSocket,
+    status: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None)
+):
+    """WebSocket stream of new and updated items (same events as /feed/items)"""
+    await websocket.accept()
+    subscription = feed_broker.subscribe(status, category)
+    # Clients never send anything, but only receive() notices a close; without
+    # it the next heartbeat is sent to a closed socket and logged as an error
+    client_closed = asyncio.create_task(wait_for_close(websocket))
+    try:
+        while True:
+            next_event = asyncio.ensure_future(subscription.next_event())
+            await asyncio.wait({next_event, client_closed}, return_when=asyncio.FIRST_COMPLETED)
+            if client_closed.done():
+                next_event.cancel()
+                break
+            event = next_event.result()
+            await websocket.send_json(event if event is not None else {"op": "PING"})
+            if event is CLOSING_EVENT:
+                await websocket.close(code=1012)  # Service restart
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        client_closed.cancel()
+        feed_broker.unsubscribe(subscription)
+
+
 # ============================================
 # Image Upload Endpoint
 # ============================================
@@ -418,3 +558,4 @@ if __name__ == "__main__":
         port=int(os.getenv("API_PORT", 8000)),
         reload=True
     )
+    # Production: python serve.py
@@ -0,0 +1,304 @@
+"""
+Match notification outbox worker
+Claims un-notified item_matches in batches, sends one digest per reporter,
+and marks the delivered matches as notified in bulk. Failed deliveries back
+off exponentially and are dead-lettered after NOTIFY_MAX_ATTEMPTS.
+Run: python notifier.py [--once] [--batch-size N] [--interval SECONDS]
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column
+from pydantic import BaseModel
+from database import SessionLocal, User, Item, ItemMatch
+from typing import Dict, List, Optional
+from datetime import datetime
+import argparse
+import importlib
+import json
+import os
+import time
+
+# Configuration (environment already loaded by database.py)
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", 200))
+NOTIFY_INTERVAL = float(os.getenv("NOTIFY_INTERVAL", 10))
+NOTIFY_SENDER = os.getenv("NOTIFY_SENDER", "log")
+NOTIFY_LOG_FILE = os.getenv("NOTIFY_LOG_FILE", "./notifications.log")
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", 8))
+NOTIFY_BACKOFF_BASE = int(os.getenv("NOTIFY_BACKOFF_BASE", 60))
+NOTIFY_BACKOFF_MAX = int(os.getenv("NOTIFY_BACKOFF_MAX", 6 * 3600))
+
+
+# ============================================
+# Digest Schemas
+# ============================================
+
+class MatchDigestEntry(BaseModel):
+    """One possible match inside a digest"""
+    match_id: str
+    lost_item_id: str
+    lost_item_title: str
+    found_item_id: str
+    found_item_title: str
+    found_item_location: str
+    similarity_score: float
+
+
+class MatchDigest(BaseModel):
+    """All pending matches for one reporter, delivered as a single message"""
+    user_id: str
+    email: str
+    name: str
+    matches: List[MatchDigestEntry]
+
+
+# ============================================
+# Senders
+# ============================================
+
+class NotificationSender:
+    """Base class for delivery backends; send() raises on failure"""
+
+    def send(self, digest: MatchDigest):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LogSender(NotificationSender):
+    """Local stand-in: appends each digest as a JSON line to a file"""
+
+    def __init__(self, path: str = NOTIFY_LOG_FILE):
+        self.path = path
+
+    def send(self, digest: MatchDigest):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"sent_at": datetime.utcnow().isoformat(), **digest.model_dump()}) + "\n")
+
+
+SENDERS = {
+    "log": LogSender,
+}
+
+
+def load_sender(name: str = NOTIFY_SENDER) -> NotificationSender:
+    """Build a sender from a registered name or a 'module:ClassName' path"""
+    if name in SENDERS:
+        return SENDERS[name]()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown notification sender: {name}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# ============================================
+# Metrics
+# ============================================
+
+class NotifierMetrics:
+    """Running counters for throughput and lag"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.batches = 0
+        self.matches_notified = 0
+        self.digests_sent = 0
+        self.digests_failed = 0
+        self.last_batch_seconds = 0.0
+        self.last_lag_seconds = 0.0
+
+    def record_batch(self, notified: int, sent: int, failed: int, seconds: float, lag_seconds: float):
+        self.batches += 1
+        self.matches_notified += notified
+        self.digests_sent += sent
+        self.digests_failed += failed
+        self.last_batch_seconds = seconds
+        self.last_lag_seconds = lag_seconds
+
+    @property
+    def throughput(self) -> float:
+        """Matches notified per second since start"""
+        elapsed = time.monotonic() - self.started_at
+        return self.matches_notified / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"batches={self.batches} notified={self.matches_notified} "
+            f"digests={self.digests_sent} failed={self.digests_failed} "
+            f"last_batch={self.last_batch_seconds:.3f}s lag={self.last_lag_seconds:.1f}s "
+            f"throughput={self.throughput:.1f}/s"
+        )
+
+
+# ============================================
+# Worker
+# ============================================
+
+def pending_filter():
+    """Matches still to deliver: not notified and not dead-lettered"""
+    return (ItemMatch.notified == False) & (ItemMatch.failed == False)  # noqa: E712
+
+
+def claim_batch(db: Session, batch_size: int) -> List[ItemMatch]:
+    """
+    Lock the matches that are due, oldest first; rows backing off after a
+    failure are skipped until next_attempt_at.
+    SKIP LOCKED lets several workers run side by side without double-sending.
+    """
+    return (
+        db.query(ItemMatch)
+        .filter(pending_filter(), ItemMatch.next_attempt_at <= func.now())
+        .order_by(ItemMatch.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def schedule_retry(db: Session, match_ids: List, error: Exception):
+    """Exponential backoff per match; dead-letter after NOTIFY_MAX_ATTEMPTS"""
+    delay_seconds = func.least(NOTIFY_BACKOFF_BASE * func.power(2, ItemMatch.attempts), NOTIFY_BACKOFF_MAX)
+    db.query(ItemMatch).filter(ItemMatch.id.in_(match_ids)).update({
+        ItemMatch.attempts: ItemMatch.attempts + 1,
+        ItemMatch.next_attempt_at: func.now() + literal_column("interval '1 second'") * delay_seconds,
+        ItemMatch.failed: ItemMatch.attempts + 1 >= NOTIFY_MAX_ATTEMPTS,
+        ItemMatch.last_error: str(error)[:500],
+    }, synchronize_session=False)
+
+
+def build_digests(db: Session, matches: List[ItemMatch]) -> Dict[str, tuple]:
+    """Group matches by the lost item's reporter -> {user_id: (digest, [match ids])}"""
+    item_ids = {m.lost_item_id for m in matches} | {m.found_item_id for m in matches}
+    items = {item.id: item for item in db.query(Item).filter(Item.id.in_(item_ids)).all()}
+    reporter_ids = {items[m.lost_item_id].reporter_id for m in matches if m.lost_item_id in items}
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(reporter_ids)).all()}
+
+    digests: Dict[str, tuple] = {}
+    for match in matches:
+        lost = items.get(match.lost_item_id)
+        found = items.get(match.found_item_id)
+        if lost is None or found is None:
+            continue
+        user = users[lost.reporter_id]
+        key = str(user.id)
+        if key not in digests:
+            digests[key] = (MatchDigest(user_id=key, email=user.email, name=user.name, matches=[]), [])
+        digest, match_ids = digests[key]
+        digest.matches.append(MatchDigestEntry(
+            match_id=str(match.id),
+            lost_item_id=str(lost.id),
+            lost_item_title=lost.title,
+            found_item_id=str(found.id),
+            found_item_title=found.title,
+            found_item_location=found.location,
+            similarity_score=match.similarity_score
+        ))
+        match_ids.append(match.id)
+    return digests
+
+
+def process_batch(
+    db: Session,
+    sender: NotificationSender,
+    metrics: NotifierMetrics,
+    batch_size: int = NOTIFY_BATCH_SIZE
+) -> tuple:
+    """Claim, send and mark one batch -> (matches claimed, matches notified)"""
+    started = time.monotonic()
+    matches = claim_batch(db, batch_size)
+    if not matches:
+        db.rollback()
+        return 0, 0
+
+    # Lag in SQL: created_at is server-local TIMESTAMP, so Python's clock can't be compared
+    lag_seconds = float(
+        db.query(func.extract("epoch", func.now() - func.min(ItemMatch.created_at)))
+        .filter(ItemMatch.id.in_([m.id for m in matches]))
+        .scalar() or 0
+    )
+    delivered_ids = []
+    sent = failed = 0
+    for user_id, (digest, match_ids) in build_digests(db, matches).items():
+        try:
+            sender.send(digest)
+        except Exception as e:
+            # Back off these rows instead of retrying them at the head of every batch
+            print(f" Failed to notify {digest.email}: {e}")
+            schedule_retry(db, match_ids, e)
+            failed += 1
+            continue
+        delivered_ids.extend(match_ids)
+        sent += 1
+
+    if delivered_ids:
+        db.query(ItemMatch).filter(ItemMatch.id.in_(delivered_ids)).update(
+            {ItemMatch.notified: True}, synchronize_session=False
+        )
+    db.commit()
+
+    metrics.record_batch(len(delivered_ids), sent, failed, time.monotonic() - started, lag_seconds)
+    print(f" {metrics.summary()}")
+    return len(matches), len(delivered_ids)
+
+
+def get_outbox_stats(db: Session) -> dict:
+    """Pending/dead-letter counts and age of the oldest pending match (works across processes)"""
+    pending, oldest, lag_seconds = (
+        db.query(
+            func.count(ItemMatch.id),
+            func.min(ItemMatch.created_at),
+            func.extract("epoch", func.now() - func.min(ItemMatch.created_at))
+        )
+        .filter(pending_filter())
+        .one()
+    )
+    dead_lettered = db.query(func.count(ItemMatch.id)).filter(
+        ItemMatch.notified == False, ItemMatch.failed == True  # noqa: E712
+    ).scalar()
+    return {
+        "pending": pending,
+        "dead_lettered": dead_lettered,
+        "oldest_pending_at": oldest,
+        "lag_seconds": float(lag_seconds or 0),
+    }
+
+
+def run(once: bool = False, batch_size: int = NOTIFY_BATCH_SIZE, interval: float = NOTIFY_INTERVAL,
+        sender: Optional[NotificationSender] = None):
+    """Main worker loop: drain full batches back-to-back, sleep when idle"""
+    sender = sender or load_sender()
+    metrics = NotifierMetrics()
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                # Drain on claimed, not delivered: failed digests are backed off,
+                # so a full batch means more matches may still be due
+                claimed, _ = process_batch(db, sender, metrics, batch_size)
+            except Exception as e:
+                print(f" Notifier batch failed: {e}")
+                db.rollback()
+                claimed = 0
+            finally:
+                db.close()
+
+            if once and claimed < batch_size:
+                break
+            if claimed < batch_size:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sender.close()
+        print(f"\n Notifier stopped: {metrics.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match notification outbox worker")
+    parser.add_argument("--once", action="store_true", help="Drain pending matches and exit")
+    parser.add_argument("--batch-size", type=int, default=NOTIFY_BATCH_SIZE)
+    parser.add_argument("--interval", type=float, default=NOTIFY_INTERVAL, help="Idle poll interval (seconds)")
+    args = parser.parse_args()
+
+    print("\n Starting match notifier...\n")
+    run(once=args.once, batch_size=args.batch_size, interval=args.interval)
@@ -0,0 +1,330 @@
+"""
+Real-time item feed (Server-Sent Events / WebSocket)
+Postgres NOTIFY on items -> one LISTEN connection per worker -> fan-out to clients
+Run: python realtime.py --check-reconnect  (kills the LISTEN backend, expects a RESYNC)
+"""
+
+from sqlalchemy.engine import make_url
+from typing import Optional, Iterable, Set
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+# Configuration (environment already loaded by database.py)
+ITEM_FEED_CHANNEL = "items_feed"
+ITEM_FEED_ENABLED = os.getenv("ITEM_FEED_ENABLED", "true").lower() == "true"
+ITEM_FEED_QUEUE_SIZE = int(os.getenv("ITEM_FEED_QUEUE_SIZE", 100))
+ITEM_FEED_HEARTBEAT = float(os.getenv("ITEM_FEED_HEARTBEAT", 15))
+ITEM_FEED_RECONNECT_DELAY = 5.0
+ITEM_FEED_CONNECT_TIMEOUT = 5
+
+# Sent to a subscriber whose queue overflowed: the client should refetch GET /items once
+RESYNC_EVENT = {"op": "RESYNC"}
+# Sent once when the worker is shutting down: the client should reconnect (to another worker)
+CLOSING_EVENT = {"op": "CLOSING"}
+
+
+# ============================================
+# Subscriptions
+# ============================================
+
+class FeedSubscription:
+    """A single connected client with its filters and bounded event queue"""
+
+    def __init__(
+        self,
+        statuses: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        queue_size: int = ITEM_FEED_QUEUE_SIZE,
+        closing: Optional[asyncio.Event] = None
+    ):
+        self.statuses: Set[str] = {s.upper() for s in statuses} if statuses else set()
+        self.categories: Set[str] = set(categories) if categories else set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closing = closing or asyncio.Event()
+        self.dropped = 0
+
+    def matches(self, event: dict) -> bool:
+        """Check an event against the status/category filters (empty = everything)"""
+        if self.statuses and event.get("status") not in self.statuses:
+            return False
+        if self.categories and event.get("category") not in self.categories:
+            return False
+        return True
+
+    def offer(self, event: dict):
+        """
+        Enqueue without ever blocking the broker.
+        A slow consumer that fills its queue loses the backlog and gets a single
+        RESYNC marker instead, so memory stays bounded and the client knows to refetch.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def next_event(self, timeout: float = ITEM_FEED_HEARTBEAT) -> Optional[dict]:
+        """
+        Wait for the next event; None means the heartbeat interval elapsed.
+        Returns CLOSING_EVENT as soon as the broker starts shutting down, so
+        streams end before uvicorn's connection drain instead of holding it open.
+        """
+        if self.closing.is_set():
+            return CLOSING_EVENT
+        get_task = asyncio.ensure_future(self.queue.get())
+        closing_task = asyncio.ensure_future(self.closing.wait())
+        try:
+            await asyncio.wait({get_task, closing_task}, timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            closing_task.cancel()
+            if not get_task.done():
+                get_task.cancel()
+        if get_task.done() and not get_task.cancelled():
+            return get_task.result()
+        return CLOSING_EVENT if self.closing.is_set() else None
+
+
+# ============================================
+# Broker (one LISTEN connection per worker)
+# ============================================
+
+class ItemFeedBroker:
+    """
+    Holds a dedicated psycopg2 connection (outside the SQLAlchemy pool) that
+    LISTENs on the items channel and fans notifications out to subscribers.
+    The socket is watched with loop.add_reader, so no thread is needed.
+    """
+
+    def __init__(self, database_url: str, channel: str = ITEM_FEED_CHANNEL):
+        self.database_url = database_url
+        self.channel = channel
+        self.subscribers: Set[FeedSubscription] = set()
+        self._conn = None
+        self._fd: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._running = False
+        self.closing = asyncio.Event()
+
+    # --- lifecycle ---
+
+    async def start(self):
+        """Open the LISTEN connection in the background (retries on failure)"""
+        self._loop = asyncio.get_running_loop()
+        self._running = True
+        self._reconnect_task = self._loop.create_task(self._reconnect(initial=True))
+
+    def begin_shutdown(self):
+        """
+        Tell open streams to finish. Called from the server's exit signal
+        handler (see serve.py), before connections are drained.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.closing.set)
+        else:
+            self.closing.set()
+
+    async def stop(self):
+        """Close the LISTEN connection and stop reconnect attempts"""
+        self.closing.set()
+        self._running = False
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._disconnect()
+
+    def _connect_kwargs(self) -> dict:
+        """Translate the SQLAlchemy URL into psycopg2.connect() keyword arguments"""
+        url = make_url(self.database_url)
+        kwargs = url.translate_connect_args(username="user", database="dbname")
+        kwargs.update(url.query)
+        kwargs.setdefault("connect_timeout", ITEM_FEED_CONNECT_TIMEOUT)
+        return kwargs
+
+    def _open_connection(self):
+        """Blocking connect + LISTEN; runs in the default executor, never on the loop"""
+        conn = psycopg2.connect(**self._connect_kwargs())
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {self.channel};")
+        return conn
+
+    async def _connect(self) -> bool:
+        try:
+            conn = await self._loop.run_in_executor(None, self._open_connection)
+        except psycopg2.Error as e:
+            print(f"❌ Item feed listener failed to connect: {e}")
+            return False
+
+        if not self._running:
+            # stop() was called while we were connecting
+            conn.close()
+            return False
+        # Keep the fd: once the server drops us, conn.fileno() raises InterfaceError
+        self._conn = conn
+        self._fd = conn.fileno()
+        self._loop.add_reader(self._fd, self._on_readable)
+        print(f"✅ Item feed listening on '{self.channel}'")
+        return True
+
+    def _disconnect(self):
+        if self._conn is None:
+            return
+        try:
+            if self._fd is not None:
+                self._loop.remove_reader(self._fd)
+        except (ValueError, OSError):
+            pass
+        try:
+            self._conn.close()
+        except psycopg2.Error:
+            pass
+        finally:
+            self._conn = None
+            self._fd = None
+
+    def _schedule_reconnect(self):
+        if self._running and (self._reconnect_task is None or self._reconnect_task.done()):
+            self._reconnect_task = self._loop.create_task(self._reconnect())
+
+    async def _reconnect(self, initial: bool = False):
+        while self._running and self._conn is None:
+            if not initial:
+                await asyncio.sleep(ITEM_FEED_RECONNECT_DELAY)
+            if await self._connect():
+                if not initial:
+                    # Events raised while we were disconnected are lost
+                    self.publish(RESYNC_EVENT)
+                return
+            initial = False
+
+    # --- notifications ---
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            print(f"❌ Item feed listener lost connection: {e}")
+            self._disconnect()
+            self._schedule_reconnect()
+            return
+
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                event = json.loads(notify.payload)
+            except ValueError:
+                continue
+            self.publish(event)
+
+    def publish(self, event: dict):
+        """Fan an event out to every matching subscriber"""
+        for subscription in list(self.subscribers):
+            if event is RESYNC_EVENT or subscription.matches(event):
+                subscription.offer(event)
+
+    # --- subscribers ---
+
+    def subscribe(
+        self,
+        statuses: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None
+    ) -> FeedSubscription:
+        """Register a new client"""
+        subscription = FeedSubscription(statuses, categories, closing=self.closing)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription):
+        """Remove a client (safe to call twice)"""
+        self.subscribers.discard(subscription)
+
+
+# ============================================
+# Helper Functions
+# ============================================
+
+def format_sse(event: Optional[dict]) -> str:
+    """Encode an event as an SSE frame (None becomes a keep-alive comment)"""
+    if event is None:
+        return ": ping\n\n"
+    return f"event: {event['op'].lower()}\ndata: {json.dumps(event)}\n\n"
+
+
+# ============================================
+# Reconnect Check
+# ============================================
+
+def terminate_backend(connect_kwargs: dict, pid: int):
+    """Kill a backend from a separate connection (what a failover or DBA would do)"""
+    conn = psycopg2.connect(**connect_kwargs)
+    try:
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+    finally:
+        conn.close()
+
+
+async def check_reconnect(database_url: str, timeout: float = 30.0) -> bool:
+    """
+    Start a broker, terminate its LISTEN backend with pg_terminate_backend and
+    check that it reconnects on a new backend and publishes RESYNC to subscribers.
+    """
+    broker = ItemFeedBroker(database_url)
+    await broker.start()
+    subscription = broker.subscribe()
+    deadline = time.monotonic() + timeout
+    try:
+        while broker._conn is None:
+            if time.monotonic() > deadline:
+                print("❌ Listener never connected")
+                return False
+            await asyncio.sleep(0.1)
+        old_pid = broker._conn.get_backend_pid()
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, terminate_backend, broker._connect_kwargs(), old_pid)
+        print(f" Terminated LISTEN backend {old_pid}, waiting for RESYNC...")
+
+        while time.monotonic() < deadline:
+            event = await subscription.next_event(timeout=deadline - time.monotonic())
+            if event is RESYNC_EVENT:
+                break
+        else:
+            print("❌ No RESYNC after the backend was terminated")
+            return False
+
+        if broker._conn is None or broker._conn.get_backend_pid() == old_pid:
+            print("❌ RESYNC published but the listener is not on a new backend")
+            return False
+        print(f"✅ Reconnected on backend {broker._conn.get_backend_pid()} and published RESYNC")
+        return True
+    finally:
+        broker.unsubscribe(subscription)
+        await broker.stop()
+
+
+if __name__ == "__main__":
+    from database import DATABASE_URL
+
+    parser = argparse.ArgumentParser(description="Item feed listener checks")
+    parser.add_argument("--check-reconnect", action="store_true",
+                        help="Kill the LISTEN backend and verify the broker reconnects")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if not args.check_reconnect:
+        parser.print_help()
+        sys.exit(0)
+    sys.exit(0 if asyncio.run(check_reconnect(DATABASE_URL, args.timeout)) else 1)
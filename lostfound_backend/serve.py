@@ -0,0 +1,149 @@
+"""
+Production server entry point
+Pre-forks N uvicorn workers with uvloop/httptools and sizes each worker's
+DB pool so that pool connections across all workers fit under Postgres' limit.
+Run: python serve.py [--workers N] [--host HOST] [--port PORT]
+"""
+
+from dotenv import load_dotenv
+import argparse
+import importlib.util
+import os
+import sys
+
+# Load .env once in the supervisor; workers (which re-import this module) inherit the environment
+if not os.getenv("LOSTFOUND_ENV_LOADED"):
+    load_dotenv()
+    os.environ["LOSTFOUND_ENV_LOADED"] = "1"
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+# Configuration
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", 8000))
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY")
+PG_MAX_CONNECTIONS = int(os.getenv("PG_MAX_CONNECTIONS", 100))
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", 10))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+# Proxies whose X-Forwarded-For is trusted (comma-separated IPs, or "*" behind a private proxy)
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Per-worker pool never grows past the single-process defaults
+MAX_POOL_SIZE = 10
+MAX_POOL_OVERFLOW = 10
+# Smallest useful pool: 1 persistent + 1 overflow connection
+MIN_POOL_CONNECTIONS = 2
+
+
+def listener_connections() -> int:
+    """Each worker holds one LISTEN connection for the item feed when enabled"""
+    return 1 if os.getenv("ITEM_FEED_ENABLED", "true").lower() == "true" else 0
+
+
+def max_workers(max_connections: int = PG_MAX_CONNECTIONS, reserved: int = DB_RESERVED_CONNECTIONS) -> int:
+    """Most workers the connection budget can hold with the smallest useful pool"""
+    return max(1, (max_connections - reserved) // (MIN_POOL_CONNECTIONS + listener_connections()))
+
+
+def size_pools(workers: int, max_connections: int = PG_MAX_CONNECTIONS,
+               reserved: int = DB_RESERVED_CONNECTIONS) -> tuple:
+    """Split the connection budget across workers -> (pool_size, max_overflow)"""
+    per_worker = max(MIN_POOL_CONNECTIONS, (max_connections - reserved) // workers - listener_connections())
+    pool_size = min(MAX_POOL_SIZE, per_worker // 2)
+    max_overflow = min(MAX_POOL_OVERFLOW, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+class DrainingServer(uvicorn.Server):
+    """Tells the item feed to close its streams as soon as an exit signal arrives"""
+
+    def handle_exit(self, sig, frame):
+        # SSE/WebSocket streams only end when told to; without this the drain
+        # always runs into --graceful-timeout and the streams are cut hard
+        app_module = sys.modules.get("main")
+        broker = getattr(app_module, "feed_broker", None)
+        if broker is not None:
+            broker.begin_shutdown()
+        super().handle_exit(sig, frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Lost & Found API in production")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=positive_int,
+                        default=WEB_CONCURRENCY,  # string defaults go through `type` too
+                        help="Worker processes (default: CPU count, capped by the connection budget)")
+    parser.add_argument("--graceful-timeout", type=int, default=GRACEFUL_TIMEOUT,
+                        help="Seconds to drain in-flight requests on shutdown")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    pools_fixed = bool(os.getenv("DB_POOL_SIZE") and os.getenv("DB_MAX_OVERFLOW"))
+
+    if pools_fixed:
+        # Explicit pool settings win; just warn if they overshoot the budget
+        per_worker = int(os.environ["DB_POOL_SIZE"]) + int(os.environ["DB_MAX_OVERFLOW"]) + listener_connections()
+        if per_worker * workers > PG_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS:
+            print(
+                f"⚠️  {workers} workers x {per_worker} connections exceeds the budget of "
+                f"{PG_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS} (PG_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS)"
+            )
+    else:
+        limit = max_workers()
+        if workers > limit:
+            print(
+                f"⚠️  {workers} workers would exceed {PG_MAX_CONNECTIONS} Postgres connections "
+                f"({DB_RESERVED_CONNECTIONS} reserved); starting {limit} workers instead"
+            )
+            workers = limit
+        pool_size, max_overflow = size_pools(workers)
+        os.environ["DB_POOL_SIZE"] = str(pool_size)
+        os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+    # uvloop is not available on Windows; fall back to the stdlib loop there
+    loop = "uvloop" if has_module("uvloop") else "asyncio"
+    http = "httptools" if has_module("httptools") else "h11"
+
+    print(
+        f" Starting {workers} workers on {args.host}:{args.port} "
+        f"(loop={loop}, http={http}, pool={os.environ['DB_POOL_SIZE']}+{os.environ['DB_MAX_OVERFLOW']} per worker)"
+    )
+
+    # SIGTERM/SIGINT close feed streams, stop accepting new connections and let
+    # in-flight requests finish for up to --graceful-timeout seconds
+    config = uvicorn.Config(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level="info"
+    )
+    server = DrainingServer(config=config)
+    if workers > 1:
+        # Same as uvicorn.run(), but with our Server subclass in every worker
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+-- ============================================
+-- Migration 001: Real-time item feed
+-- Adds the NOTIFY trigger used by GET /feed/items and /ws/items
+-- Safe to re-run on an existing database
+-- ============================================
+
+CREATE OR REPLACE FUNCTION notify_items_feed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('items_feed', json_build_object(
+        'op', TG_OP,
+        'id', NEW.id,
+        'status', NEW.status,
+        'category', NEW.category,
+        'title', NEW.title,
+        'updated_at', NEW.updated_at
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS items_feed_notify ON items;
+
+CREATE TRIGGER items_feed_notify
+    AFTER INSERT OR UPDATE ON items
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_items_feed();
@@ -0,0 +1,7 @@
+-- ============================================
+-- Migration 002: Match notification outbox
+-- Partial index so the notifier can claim pending matches without scanning
+-- Safe to re-run on an existing database
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_matches_pending ON item_matches(created_at) WHERE notified = FALSE;
@@ -0,0 +1,22 @@
+-- ============================================
+-- Migration 003: Hot/cold item storage
+-- Archive tables filled by lostfound_backend/archiver.py
+-- Safe to re-run on an existing database
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS items_archive (
+    LIKE items INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    FOREIGN KEY (reporter_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS item_matches_archive (
+    LIKE item_matches INCLUDING DEFAULTS,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+);
+
+-- ItemsArchive: Reporter lookup and lookups by age
+CREATE INDEX IF NOT EXISTS idx_items_archive_reporter ON items_archive(reporter_id);
+CREATE INDEX IF NOT EXISTS idx_items_archive_created ON items_archive(created_at DESC);
@@ -0,0 +1,21 @@
+-- ============================================
+-- Migration 004: Match outbox retries
+-- Attempt count, backoff and dead-letter state for notifier.py
+-- Safe to re-run on an existing database
+-- ============================================
+
+ALTER TABLE item_matches ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE item_matches ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE item_matches ADD COLUMN IF NOT EXISTS failed BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE item_matches ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+-- Existing pending rows keep their original queue position
+UPDATE item_matches SET next_attempt_at = created_at WHERE attempts = 0 AND notified = FALSE;
+
+ALTER TABLE item_matches_archive ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE item_matches_archive ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP;
+ALTER TABLE item_matches_archive ADD COLUMN IF NOT EXISTS failed BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE item_matches_archive ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+DROP INDEX IF EXISTS idx_matches_pending;
+CREATE INDEX idx_matches_pending ON item_matches(next_attempt_at) WHERE notified = FALSE AND failed = FALSE;
@@ -0,0 +1,24 @@
+-- ============================================
+-- Migration 005: Quiet archive restores
+-- archiver.restore_item() sets lostfound.feed_notify = 'off' for the
+-- restoring INSERT so feed clients don't see an old item as a new report
+-- Safe to re-run on an existing database
+-- ============================================
+
+CREATE OR REPLACE FUNCTION notify_items_feed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('lostfound.feed_notify', true) = 'off' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('items_feed', json_build_object(
+        'op', TG_OP,
+        'id', NEW.id,
+        'status', NEW.status,
+        'category', NEW.category,
+        'title', NEW.title,
+        'updated_at', NEW.updated_at
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
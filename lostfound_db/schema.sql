@@ -61,10 +61,38 @@ CREATE TABLE item_matches (
     notified BOOLEAN DEFAULT FALSE,                   -- Has user been notified?
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    -- Notification delivery (notifier.py)
+    attempts INTEGER NOT NULL DEFAULT 0,              -- Failed delivery attempts
+    next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Backoff: not retried before this
+    failed BOOLEAN NOT NULL DEFAULT FALSE,            -- Dead letter: gave up after max attempts
+    last_error TEXT,
+
     -- Prevent duplicate matches
     UNIQUE(lost_item_id, found_item_id)
 );
 
+-- ============================================
+-- TABLES: Cold storage (archiver.py)
+-- Purpose: REUNITED and aged items move here so the hot items table stays small
+-- Same columns as the hot tables; no FK from matches so archived rows stay intact
+-- ============================================
+CREATE TABLE items_archive (
+    LIKE items INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    FOREIGN KEY (reporter_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE item_matches_archive (
+    LIKE item_matches INCLUDING DEFAULTS,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+);
+
+-- ItemsArchive: Reporter lookup and lookups by age
+CREATE INDEX idx_items_archive_reporter ON items_archive(reporter_id);
+CREATE INDEX idx_items_archive_created ON items_archive(created_at DESC);
+
 -- ============================================
 -- INDEXES for Performance
 -- ============================================
@@ -90,6 +118,9 @@ CREATE INDEX idx_matches_lost_item ON item_matches(lost_item_id);
 -- ItemMatches: Find matches for a found item
 CREATE INDEX idx_matches_found_item ON item_matches(found_item_id);
 
+-- ItemMatches: Notification outbox (deliverable matches, due first)
+CREATE INDEX idx_matches_pending ON item_matches(next_attempt_at) WHERE notified = FALSE AND failed = FALSE;
+
 -- ============================================
 -- TRIGGERS: Auto-update updated_at
 -- ============================================
@@ -106,12 +137,42 @@ CREATE TRIGGER update_items_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- ============================================
+-- TRIGGERS: Real-time item feed (LISTEN/NOTIFY)
+-- Compact payload only; clients fetch full rows via GET /items/{id}
+-- Skipped while archiver.restore_item() moves an item back (lostfound.feed_notify = 'off')
+-- ============================================
+CREATE OR REPLACE FUNCTION notify_items_feed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('lostfound.feed_notify', true) = 'off' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('items_feed', json_build_object(
+        'op', TG_OP,
+        'id', NEW.id,
+        'status', NEW.status,
+        'category', NEW.category,
+        'title', NEW.title,
+        'updated_at', NEW.updated_at
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER items_feed_notify
+    AFTER INSERT OR UPDATE ON items
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_items_feed();
+
 -- ============================================
 -- COMMENTS for Documentation
 -- ============================================
 COMMENT ON TABLE users IS 'User accounts (no passwords for demo mode)';
 COMMENT ON TABLE items IS 'Lost and found items with AI-ready columns';
 COMMENT ON TABLE item_matches IS 'Similarity matches between lost/found items (V2 feature)';
+COMMENT ON TABLE items_archive IS 'Cold storage for REUNITED and aged items (read-only)';
+COMMENT ON TABLE item_matches_archive IS 'Matches of archived items';
 
 COMMENT ON COLUMN items.embedding IS 'Sentence embedding vector for semantic search (populated in V2)';
 COMMENT ON COLUMN items.ai_category_prediction IS 'ML-predicted category (populated in V2)';
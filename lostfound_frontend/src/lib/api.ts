@@ -6,6 +6,21 @@ import { getApiErrorMessage } from './utils';
 export const BASE_URL = (import.meta as any)?.env?.VITE_API_BASE_URL || 'http://localhost:8000';
 const api = axios.create({ baseURL: BASE_URL, withCredentials: false });
 
+// Read-your-writes: echo the backend's sticky deadline so reads right after a write hit the primary DB
+const READ_STICKY_HEADER = 'X-Read-Primary-Until';
+let readPrimaryUntil: string | null = null;
+api.interceptors.response.use((response) => {
+  const until = response.headers?.[READ_STICKY_HEADER.toLowerCase()];
+  if (until) readPrimaryUntil = String(until);
+  return response;
+});
+api.interceptors.request.use((config) => {
+  if (readPrimaryUntil && Number(readPrimaryUntil) * 1000 > Date.now()) {
+    config.headers.set(READ_STICKY_HEADER, readPrimaryUntil);
+  }
+  return config;
+});
+
 // Adapter: Backend ItemResponse -> Frontend IItem
 function adaptItem(item: any): IItem {
   return {